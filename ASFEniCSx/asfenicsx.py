@@ -29,7 +29,7 @@ class ASFEniCSx:
         estimation() : Performs the random sampling algorithm to construct the active subspace
         partition(n : int) : Partitions the active subspace into the active and inactive subspace
         bootstrap(n : int, info : bool, optional) : Performs the bootstrap algorithm to estimate the error
-        calculate_eigenpairs(matrix : np.ndarray) : Calculates the eigenpairs of the given matrix
+        calculate_eigenpairs(matrix : np.ndarray, n : int, optional) : Calculates the (n largest) eigenpairs of the given matrix
         plot_eigenvalues() : Plots the eigenvalues of the covariance matrix
         plot_subspace() : Plots distance of the active subspace using bootstrap
     Example:
@@ -48,7 +48,10 @@ class ASFEniCSx:
         Niklas Hornischer (nh605@cam.ac.uk)
     """
 
-    def __init__(self, k : int, function : Functional, samples : Sampling, debug = True):
+    # Minimum number of entries of the outer products of the gradients that the bootstrap holds at once
+    _outer_products_size = 1 << 20
+
+    def __init__(self, k : int, function : Functional, samples : Sampling, debug = True, dtype = np.float64, seed = None):
         """Constructor for the ASFEniCSx class
 
         Args:
@@ -56,6 +59,10 @@ class ASFEniCSx:
             function (functional): functional describing the quantity of interest
             samples (sampling): sampling object containing the samples
             debug (bool, optional): If True, debug information is printed. Defaults to False.
+            dtype (numpy.dtype, optional): Data type of the stored gradients. Using np.float32 halves the memory
+                                            traffic of the covariance products, which are then computed in float32
+                                            and converted to float64 before the eigendecomposition. Defaults to np.float64.
+            seed (int, optional): Seed of the random number generator used for the bootstrap. Defaults to None.
 
         Raises:
             ValueError: If n is larger than the number of dimensions of the parameter space
@@ -65,6 +72,8 @@ class ASFEniCSx:
         self.function = function
         self.samples = samples
         self._debug = debug
+        self._dtype = dtype
+        self._rng = np.random.default_rng(seed)
 
     def eigenvalues(self):
         """Returns the eigenvalues of the covariance matrix
@@ -72,7 +81,7 @@ class ASFEniCSx:
         Returns:
             np.ndarray: Eigenvalues of the covariance matrix
         """
-        if not hasattr(self, 'eigenvalues'):
+        if not hasattr(self, '_eigenvalues'):
             raise ValueError("Eigenvalues not calculated yet. Run the random sampling algorithm first.")
         return np.copy(self._eigenvalues)
 
@@ -87,34 +96,38 @@ class ASFEniCSx:
 
         # Check if additional arguments are given
         debug_info(self._debug, "Evaluating gradients for active subspace construction")
-        gradients = np.zeros([self.samples.M, self.samples.m])
-        for i in range(self.samples.M):
-            gradients[i] = self.function.gradient(self.samples.extract(i), self.samples, **kwargs)
+        # The gradient is an arbitrary callable (analytical, interpolated, finite differences or a
+        # FEniCSx solve), so the loop stays in Python but writes directly into the preallocated rows
+        gradients = np.zeros([self.samples.M, self.samples.m], dtype = self._dtype)
+        gradient = self.function.gradient
+        for i, x in enumerate(self.samples._array):
+            gradients[i] = gradient(x, self.samples, **kwargs)
         self.gradients = gradients
 
         # Normalize the gradients accroding to the chain rule with the bounds from the sampling space to the range [-1, 1]
+        # The scaling is computed once and skipped entirely for bounds that are already [-1, 1]
         if hasattr(self.samples, '_bounds'):
-            for i in range(self.samples.M):
-                for j in range(self.samples.m):
-                    gradients[i,j] = gradients[i,j] * (self.samples._bounds[j,1] - self.samples._bounds[j,0]) / 2
+            if not hasattr(self, '_scale'):
+                self._scale = 0.5 * (self.samples._bounds[:,1] - self.samples._bounds[:,0])
+                self._scale_is_identity = np.all(self._scale == 1.0)
+            if not self._scale_is_identity:
+                gradients *= self._scale[np.newaxis, :]
         return gradients
 
     def covariance(self, gradients : np.ndarray):
         """Approximates the covariance matrix of the gradient of the function
 
         The calculation of the gradient is defined directly in the functional.
-        The covariance matrix is approximated by the outer product of the gradient.
-        
+        The covariance matrix is approximated by the outer product of the gradient,
+        which is evaluated for all samples at once as the matrix product G^T G.
+
         Args:
             gradients (numpy.ndarray): Matrix containing the gradients of the function at the samples in the rows
 
         Returns:
-            np.ndarray: Approximated covariance matrix with dimensions m x m    
+            np.ndarray: Approximated covariance matrix with dimensions m x m
         """
-        covariance = np.zeros([self.samples.m, self.samples.m])
-        for i in range(self.samples.M):
-            covariance += np.outer(gradients[i,:], gradients[i,:])
-        covariance = covariance / self.samples.M
+        covariance = np.dot(gradients.T, gradients).astype(np.float64, copy = False) / self.samples.M
 
         return covariance
     
@@ -159,57 +172,104 @@ class ASFEniCSx:
         Returns:
             np.ndarray: Matrix containing the active subspace of dimension n
             np.ndarray: Matrix containing the inactive subspace of dimension m-n
+
+        Raises:
+            ValueError: If the eigenvalues are not calculated yet
+            ValueError: If n is larger than the dimension of the parameter space
         """
         # Check if the eigenvalues are already calculated
-        if not hasattr(self, 'eigenvalues'):
-            raise("Eigenvalues not calculated yet. Run the random sampling algorithm first.")
+        if not hasattr(self, '_eigenvalues'):
+            raise ValueError("Eigenvalues not calculated yet. Run the random sampling algorithm first.")
 
         # Check if the dimension of the active subspace is smaller than the dimension of the parameter space
         if n > self.samples.m:
-            raise("Dimension of the active subspace must be smaller than the dimension of the parameter space.")
+            raise ValueError("Dimension of the active subspace must be smaller than the dimension of the parameter space.")
 
         W1 = self._eigenvectors[:,:n]
         W2 = self._eigenvectors[:,n:]
         self.W1 = W1
         return (W1, W2)
     
-    def bootstrap(self, M_boot : int):
+    def bootstrap(self, M_boot : int, batch_size : int = 100):
         """ Compute the bootstrap values for the eigenvalues
-        
+
+        The bootstrap replicates are processed in batches, reusing the same preallocated
+        buffers for every batch.
+
         Args:
             M_boot (int): Number of bootstrap samples
-            
+            batch_size (int, optional): Number of bootstrap samples processed at once. Defaults to 100.
+
         Returns:
             np.ndarray: Bootstrap lower and upper bounds for the eigenvalues
             np.ndarray: Bootstrap lower and upper bounds for the subspace distances
         """
-        if not hasattr(self, 'gradients'):
-            self.evaluate_gradients()
-
-        if not hasattr(self, 'eigenvalues'):
+        assert batch_size > 0, "Batch size must be greater than 0"
+        # The estimation evaluates the gradients itself if they are missing
+        if not hasattr(self, '_eigenvalues'):
             self.estimation()
+        elif not hasattr(self, 'gradients'):
+            self.evaluate_gradients()
 
-        # Loop over the number of bootstrap samples
-        eigenvalues = np.zeros([self.samples.m, M_boot])
-        subspace_distances = np.zeros([self.samples.m, M_boot])
-        for i in range(M_boot):
-            # Construct bootstrap replicate
-            bootstrap_indices = np.random.randint(0, self.samples.M, size = self.samples.M)
-            bootstrap_replicate = self.gradients[bootstrap_indices,:].copy()
-
-            # Compute the bootstraped singular value decomposition
-            S, U = self.calculate_eigenpairs(self.covariance(bootstrap_replicate))
-
-            for j in range(self.samples.m-1):
-                subspace_distances[j,i] = np.linalg.norm(np.dot(self._eigenvectors[:,:j+1].T, U[:,j+1:]), ord=2)
-            eigenvalues[:,i] = S
-        sub_max = np.max(subspace_distances, axis=1)
-        sub_min = np.min(subspace_distances, axis=1)
-        sub_mean = np.mean(subspace_distances, axis=1)
-
-        # Compute the max and min of the eigenvalues over all bootstrap samples
-        e_max = np.max(eigenvalues, axis=1)
-        e_min = np.min(eigenvalues, axis=1)
+        # A bootstrap covariance matrix is the sum of the outer products g_i g_i^T weighted by how often
+        # sample i is drawn. The upper triangles of the outer products are formed once, so the covariance
+        # matrices of a whole batch are obtained from a single matrix product with the sample counts.
+        # If they would take more entries than _outer_products_size and the gradients, the outer
+        # products are formed for chunks of samples in every batch instead.
+        M, m = self.samples.M, self.samples.m
+        upper = np.triu_indices(m)
+        chunk_size = min(M, max(1, max(self._outer_products_size, M * m) // len(upper[0])))
+        outer_products = np.empty([chunk_size, len(upper[0])], dtype = self.gradients.dtype)
+        if chunk_size == M:
+            np.multiply(self.gradients[:,upper[0]], self.gradients[:,upper[1]], out = outer_products)
+
+        # Preallocate the buffers for the sample counts and the covariance matrices of a batch
+        batch_size = min(batch_size, M_boot)
+        counts = np.empty([batch_size, M], dtype = self.gradients.dtype)
+        covariances_upper = np.empty([batch_size, len(upper[0])], dtype = self.gradients.dtype)
+        covariances = np.empty([batch_size, m, m])
+        offsets = M * np.arange(batch_size)[:,np.newaxis]
+
+        # The statistics over all bootstrap samples are reduced batch by batch
+        e_max = np.full(m, -np.inf)
+        e_min = np.full(m, np.inf)
+        sub_max = np.full(m, -np.inf)
+        sub_min = np.full(m, np.inf)
+        sub_sum = np.zeros(m)
+        subspace_distances = np.zeros([m, batch_size])
+        for start in range(0, M_boot, batch_size):
+            n = min(batch_size, M_boot - start)
+
+            # Count how often each sample is drawn in the bootstrap replicates of the batch
+            bootstrap_indices = self._rng.integers(0, M, size = (n, M))
+            counts[:n] = np.bincount((bootstrap_indices + offsets[:n]).ravel(), minlength = n * M).reshape(n, M)
+
+            # Compute the bootstraped eigendecompositions of the stacked covariance matrices
+            if chunk_size == M:
+                np.matmul(counts[:n], outer_products, out = covariances_upper[:n])
+            else:
+                covariances_upper[:n] = 0
+                for first in range(0, M, chunk_size):
+                    last = min(first + chunk_size, M)
+                    np.multiply(self.gradients[first:last,upper[0]], self.gradients[first:last,upper[1]], out = outer_products[:last-first])
+                    covariances_upper[:n] += np.matmul(counts[:n,first:last], outer_products[:last-first])
+            covariances[:n,upper[0],upper[1]] = covariances_upper[:n]
+            covariances[:n,upper[1],upper[0]] = covariances_upper[:n]
+            covariances[:n] *= 1.0 / M
+            S, U = self.calculate_eigenpairs(covariances[:n])
+
+            # Project all bootstrapped eigenvectors onto the estimated ones at once, the subspace
+            # distance of dimension j+1 is then the spectral norm of the upper right block
+            projections = np.matmul(self._eigenvectors.T, U)
+            for j in range(m-1):
+                subspace_distances[j,:n] = self._spectral_norm(projections[:,:j+1,j+1:])
+
+            np.maximum(e_max, np.max(S, axis=0), out = e_max)
+            np.minimum(e_min, np.min(S, axis=0), out = e_min)
+            np.maximum(sub_max, np.max(subspace_distances[:,:n], axis=1), out = sub_max)
+            np.minimum(sub_min, np.min(subspace_distances[:,:n], axis=1), out = sub_min)
+            sub_sum += np.sum(subspace_distances[:,:n], axis=1)
+        sub_mean = sub_sum / M_boot
 
         self.e_boot = [e_max, e_min]
         self.sub_boot = [sub_max, sub_min, sub_mean]
@@ -218,26 +278,108 @@ class ASFEniCSx:
 
         return [e_max, e_min], [sub_max, sub_min, sub_mean]
     
-    def calculate_eigenpairs(self, matrix : np.ndarray):
+    def calculate_eigenpairs(self, matrix : np.ndarray, n : int = None):
         """Calculates the eigenvalues and eigenvectors of a matrix
 
+        The matrix can also be a stack of matrices with shape (..., m, m), in which case
+        all eigendecompositions are computed in a single batched call.
+        If n is given, only the n largest eigenpairs of a single matrix are computed
+        with the LAPACK solver for a subset of the spectrum.
+
         Args:
             matrix (np.ndarray): Matrix to calculate the eigenvalues and eigenvectors of
+            n (int, optional): Number of largest eigenpairs to calculate. Defaults to None (all eigenpairs).
 
         Returns:
             np.ndarray: Vector of eigenvalues
             np.ndarray: Matrix of eigenvectors stored in the columns
         """
-        e, W = np.linalg.eigh(matrix)
-        e = abs(e)
-        idx = e.argsort()[::-1]
-        e = e[idx]
-        W = W[:,idx]
-        normalization = np.sign(W[0,:])
+        if n is None and np.ndim(matrix) > 2 and np.shape(matrix)[-1] == 2:
+            e, W = self._eigh_2x2(matrix)
+        elif n is None:
+            e, W = np.linalg.eigh(matrix)
+        else:
+            assert np.ndim(matrix) == 2, "Subset of eigenpairs can only be calculated for a single matrix"
+            assert 0 < n <= np.shape(matrix)[0], "n must be positive and not larger than the dimension of the matrix"
+            from scipy.linalg import eigh
+            m = np.shape(matrix)[0]
+            e, W = eigh(matrix, subset_by_index=[m-n, m-1], driver='evr')
+        # The eigenvalues are returned in ascending order, so for the positive semi-definite
+        # covariance matrices the descending order is a reversed view. Single matrices are stored
+        # column-major to make slicing of the eigenvectors contiguous.
+        e = abs(e[...,::-1])
+        W = W[...,::-1].copy(order = 'F' if np.ndim(W) == 2 else 'C')
+        normalization = np.sign(W[...,0,:])
         normalization[normalization == 0] = 1
-        W = W * normalization
+        W *= normalization[...,np.newaxis,:]
         return e, W
     
+    def _spectral_norm(self, matrix : np.ndarray):
+        """Calculates the spectral norm of a stack of matrices
+
+        Only the largest singular value is needed, which is obtained as the square root of the
+        largest eigenvalue of the smaller of the two Gram matrices. This avoids the full
+        singular value decomposition of every matrix in the stack.
+
+        Args:
+            matrix (np.ndarray): Stack of matrices with shape (..., p, q)
+
+        Returns:
+            np.ndarray: Spectral norms with shape (...)
+        """
+        if np.shape(matrix)[-2] <= np.shape(matrix)[-1]:
+            gram = np.matmul(matrix, np.swapaxes(matrix, -1, -2))
+        else:
+            gram = np.matmul(np.swapaxes(matrix, -1, -2), matrix)
+        return np.sqrt(np.maximum(np.linalg.eigvalsh(gram)[...,-1], 0))
+
+    def _eigh_2x2(self, matrix : np.ndarray):
+        """Calculates the eigenpairs of a stack of symmetric 2x2 matrices in closed form
+
+        The eigenvalues are the roots of the characteristic polynomial and the eigenvectors
+        are given by the rotation angle that diagonalizes the matrix. For stacks of
+        matrices this avoids the per-matrix overhead of the LAPACK solver.
+
+        Args:
+            matrix (np.ndarray): Stack of symmetric matrices with shape (..., 2, 2)
+
+        Returns:
+            np.ndarray: Eigenvalues in ascending order with shape (..., 2)
+            np.ndarray: Eigenvectors stored in the columns with shape (..., 2, 2)
+        """
+        a = matrix[...,0,0]
+        b = matrix[...,0,1]
+        c = matrix[...,1,1]
+        mean = 0.5 * (a + c)
+        radius = np.hypot(0.5 * (a - c), b)
+        theta = 0.5 * np.arctan2(2 * b, a - c)
+        cos = np.cos(theta)
+        sin = np.sin(theta)
+
+        e = np.stack([mean - radius, mean + radius], axis=-1)
+        W = np.empty(np.shape(matrix))
+        W[...,0,0] = -sin
+        W[...,1,0] = cos
+        W[...,0,1] = cos
+        W[...,1,1] = sin
+        return e, W
+
+    def _figure(self):
+        """Creates a figure with a single axis that is rendered by the Agg backend
+
+        The figure is not registered with pyplot, so no global figure state has to be
+        maintained and the figure is freed as soon as it is no longer referenced.
+
+        Returns:
+            matplotlib.figure.Figure: The figure
+            matplotlib.axes.Axes: The axis of the figure
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        return fig, fig.add_subplot(111)
+
     def plot_eigenvalues(self, filename = "eigenvalues.png", true_eigenvalues = None, ylim=None):
         """Plots the eigenvalues of the covariance matrix on a logarithmic scale
 
@@ -249,25 +391,23 @@ class ASFEniCSx:
         """
         if not hasattr(self, "_eigenvectors"):
             raise ValueError("Eigendecomposition of the covariance matrix is not defined. Calculate it first.")
-        import matplotlib.pyplot as plt
-        fig = plt.figure(filename)
-        ax = fig.gca()
-        ax.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
+        from matplotlib.ticker import MaxNLocator
+        fig, ax = self._figure()
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
         if true_eigenvalues is not None:
             ax.plot(range(1, self.k+1), true_eigenvalues[:self.k], marker="o", fillstyle="none", label="True")
         ax.plot(range(1, self.k+1), self._eigenvalues[:self.k], marker="x", fillstyle="none", label="Est")
         if hasattr(self, "e_boot"):
             debug_info(self._debug, "Plotting bootstrap bounds for eigenvalues")
             ax.fill_between(range(1, self.k+1), self.e_boot[0][:self.k], self.e_boot[1][:self.k], alpha=0.5, label = "BI")
-        plt.yscale("log")
-        plt.xlabel("Index")
-        plt.ylabel("Eigenvalue")
-        plt.legend()
-        plt.grid()
+        ax.set_yscale("log")
+        ax.set_xlabel("Index")
+        ax.set_ylabel("Eigenvalue")
+        ax.legend()
+        ax.grid()
         if ylim is not None:
-            plt.ylim(ylim)
-        plt.savefig(filename)
-        plt.close()
+            ax.set_ylim(ylim)
+        fig.savefig(filename)
 
     def plot_subspace(self, filename = "subspace", true_subspace = None, ylim=None):
         """Plots the subspace distances
@@ -279,25 +419,23 @@ class ASFEniCSx:
         """
         if not hasattr(self, "_eigenvectors"):
             raise ValueError("Eigendecomposition of the covariance matrix is not defined. Calculate it first.")
-        import matplotlib.pyplot as plt
-        fig = plt.figure(filename)
-        ax = fig.gca()
-        ax.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
+        from matplotlib.ticker import MaxNLocator
+        fig, ax = self._figure()
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
         if true_subspace is not None:
             ax.plot(range(1, self.k), true_subspace[:self.k-1], marker="o", fillstyle="none", label="True")
         ax.plot(range(1, self.k), self.sub_boot[2][:self.k-1], marker="x", fillstyle="none", label="Est")
         if hasattr(self, "sub_boot"):
             debug_info(self._debug, "Plotting bootstrap bounds for subspace distances")
             ax.fill_between(range(1, self.k), self.sub_boot[0][:self.k-1], self.sub_boot[1][:self.k-1], alpha=0.5, label = "BI")
-        plt.xlabel("Subspace Dimension")
-        plt.yscale("log")
-        plt.ylabel("Subspace Error")
-        plt.legend()
-        plt.grid()
+        ax.set_xlabel("Subspace Dimension")
+        ax.set_yscale("log")
+        ax.set_ylabel("Subspace Error")
+        ax.legend()
+        ax.grid()
         if ylim is not None:
-            plt.ylim(ylim)
-        plt.savefig(filename)
-        plt.close()
+            ax.set_ylim(ylim)
+        fig.savefig(filename)
 
     def plot_sufficient_summary(self, filename = "sufficient_summary"):
 
@@ -310,45 +448,37 @@ class ASFEniCSx:
         if hasattr(self.samples, "_values"):
             values = self.samples.values()
         else:
-            values = np.asarray([self.function.evaluate(self.samples.extract(i)) for i in range(self.samples.M)])
+            values = self.function.evaluate_batch(self.samples._array)
 
         n = active_variable_values.shape[1]
-        import matplotlib.pyplot as plt
 
         for i in range(min(n, 2)):
-            if n > 1:
-                fig = plt.figure(filename + f"univariate_{i+1}")
-            else:
-                fig = plt.figure(filename + f"univariate")
-            ax = fig.gca()
+            fig, ax = self._figure()
             ax.scatter(active_variable_values[:,i], values)
             if n > 1:
-                plt.xlabel(f"Active Variable {i+1}")
+                ax.set_xlabel(f"Active Variable {i+1}")
             else:
-                plt.xlabel("Active Variable")
-            plt.ylabel("Function Value")
-            plt.grid()
+                ax.set_xlabel("Active Variable")
+            ax.set_ylabel("Function Value")
+            ax.grid()
             if n > 1:
-                plt.savefig(filename + f"univariate_{i+1}")
+                fig.savefig(filename + f"univariate_{i+1}")
             else:
-                plt.savefig(filename + f"univariate")
-            plt.close()
+                fig.savefig(filename + f"univariate")
         
         if n > 1 and n<=2:
-            plt.figure(filename + f"bivariate")
-            plt.axes().set_aspect('equal')
-            plt.scatter(active_variable_values[:,0], active_variable_values[:,1], c=values, vmin=np.min(values), vmax=np.max(values) )
-            plt.xlabel("Active Variable 1")
-            plt.ylabel("Active Variable 2")
+            fig, ax = self._figure()
+            ax.set_aspect('equal')
+            scatter = ax.scatter(active_variable_values[:,0], active_variable_values[:,1], c=values, vmin=np.min(values), vmax=np.max(values) )
+            ax.set_xlabel("Active Variable 1")
+            ax.set_ylabel("Active Variable 2")
             ymin = 1.1*np.min([np.min(active_variable_values[:,0]) ,np.min( active_variable_values[:,1])])
             ymax = 1.1*np.max([np.max(active_variable_values[:,0]) ,np.max( active_variable_values[:,1])])
-            plt.axis([ymin, ymax, ymin, ymax])    
-            plt.grid()
+            ax.axis([ymin, ymax, ymin, ymax])
+            ax.grid()
             
-            plt.colorbar()
-            plt.savefig(filename + f"bivariate")
-    
-            plt.close()
+            fig.colorbar(scatter, ax=ax)
+            fig.savefig(filename + f"bivariate")
 
     def plot_eigenvectors(self, filename = "eigenvectors.png", true_eigenvectors = None, n = None):
         """Plots the eigenvectors of the covariance matrix
@@ -363,20 +493,18 @@ class ASFEniCSx:
             n = self.k
         if not hasattr(self, "_eigenvectors"):
             raise ValueError("Eigendecomposition of the covariance matrix is not defined. Calculate it first.")
-        import matplotlib.pyplot as plt
-        fig = plt.figure(filename)
-        ax = fig.gca()
-        ax.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
+        from matplotlib.ticker import MaxNLocator
+        fig, ax = self._figure()
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
         for i in range(n):
             if true_eigenvectors is not None:
                 ax.plot(range(1, self.k+1), true_eigenvectors[:,i], marker="o", fillstyle="none", label=f"True ({i+1}))")
             ax.plot(range(1, self.k+1), self._eigenvectors[:,i], marker="x", fillstyle="none", label=f"Est ({i+1})")
-        plt.xlabel("Index")
-        plt.ylim([-1,1])
-        plt.ylabel("Eigenvector")
-        plt.legend()
-        plt.grid()
-        plt.savefig(filename)
-        plt.close()
+        ax.set_xlabel("Index")
+        ax.set_ylim([-1,1])
+        ax.set_ylabel("Eigenvector")
+        ax.legend()
+        ax.grid()
+        fig.savefig(filename)
 
 # TODO: Check if private/protected variales are returned as objects or as copys.
\ No newline at end of file
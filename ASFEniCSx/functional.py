@@ -13,6 +13,7 @@ class Functional:
         use_clusters (boolean): If True, the interpolant will be evaluated using the clusters of the clustering object (if created)
     private:
         _number_of_calls (int): Number of calls to the function
+        _vectorized (bool): If True, the function accepts an array of shape (m, M) and returns the M values at once
         _derivative (callable): Analytical derivative of the function (if created)
         _interpolant (callable): Interpolant of the function (if created)
         _interpolants (list): List of callable interpolants of the function (if created)
@@ -23,6 +24,7 @@ class Functional:
         number_of_calls() -> int: Returns the number of calls to the function
         reset_number_of_calls(): Resets the number of calls to the function
         evaluate(x : numpy.ndarrray) -> float: Evaluates the function at the point x
+        evaluate_batch(X : numpy.ndarray) -> numpy.ndarray: Evaluates the function at all rows of X
         get_derivative(dfdx : callable): Set the analytical derivative of the function
         get_gradient_method(method : str): Sets the method for calculating the gradient
         interpolation(samling : sampling): Calculates the interpolant and its derivative of the given function
@@ -60,13 +62,15 @@ class Functional:
     Contributors:
         Niklas Hornischer (nh605@cam.ac.uk)
     """
-    def __init__(self, m : int, f : callable, debug = True):
+    def __init__(self, m : int, f : callable, debug = True, vectorized = False):
         """Constructor of the functional class
         
         Args:
             m (int): Dimension of the parameter space
             f (function): Function to be evaluated  
             debug (bool, optional): If True, debug information will be printed. Default is False
+            vectorized (bool, optional): If True, f accepts an array of shape (m, M), i.e. x[i] holds the i-th
+                                            parameter of M points, and returns the M values. Default is False
         
         Raises:
             AssertionError: If the dimension of the parameter space is not positive
@@ -78,6 +82,7 @@ class Functional:
         self.f = f
         self._number_of_calls = 0
         self._debug = debug
+        self._vectorized = vectorized
         debug_info(self._debug, f"New functional object created with pointer {self}")
             
     def number_of_calls(self):
@@ -108,6 +113,32 @@ class Functional:
         self._number_of_calls += 1
         return self.f(x)
 
+    def evaluate_batch(self, X : np.ndarray):
+        """ Evaluates the function at a set of points
+
+        If the functional is vectorized, the function is called once with the transposed array
+        of shape (m, M). Otherwise the function is evaluated point by point.
+
+        Args:
+            X (numpy.ndarray): Points at which the function is evaluated with shape (M, m)
+
+        Returns:
+            numpy.ndarray: Values of the function at the points with shape (M,)
+
+        Raises:
+            AssertionError: If the dimension of X does not match the dimension of the parameter space
+            AssertionError: If the vectorized function does not return one value per point
+        """
+        assert np.ndim(X) == 2 and np.shape(X)[1] == self.m, "X must be an array of shape (M, m)"
+        M = np.shape(X)[0]
+        if self._vectorized:
+            self._number_of_calls += M
+            # Copy the values, since f may return a view of X
+            values = np.array(self.f(X.T), dtype = np.float64)
+            assert np.shape(values) == (M,), "Vectorized function must return one value per point"
+            return values
+        return np.fromiter((self.evaluate(x) for x in X), dtype = np.float64, count = M)
+
     def get_derivative(self, dfdx : callable):
         """Sets the explicitly formulated derivative of the function
 
@@ -180,7 +211,7 @@ class Functional:
             self._derivative = self.multivariate_polynomial_derivative(coefficients, exponents)
         # Calculates multiple local interpolates based on the defined clusters
         else: 
-            if not hasattr(sampling, "_clusters"):
+            if not hasattr(sampling, "_cluster_offsets"):
                 raise ValueError("The samples object does not contain any clusters. Please set clustering to False")
             if hasattr(self, "_interpolants") and not overwrite:
                 raise ValueError("The interpolants have already been calculated. Please set overwrite to True to overwrite the interpolants")
@@ -327,7 +358,7 @@ class Functional:
         if hasattr(self, '_interpolant') and not self.use_clusters:
             return self._interpolant(x)
         elif hasattr(self, '_interpolants') and self.use_clusters:
-            if sampling is None or not hasattr(sampling, '_clusters'):
+            if sampling is None or not hasattr(sampling, '_cluster_offsets'):
                 raise ValueError("No clusters given. Construct global interpolant or specify cluster.")
             cluster_idx = sampling.obtain_index(x)
             return self._interpolants[cluster_idx](x)
@@ -362,7 +393,7 @@ class Functional:
             if hasattr(self, '_interpolant') and not self.use_clusters:
                 return self._derivative(x)
             elif hasattr(self, '_interpolants') and self.use_clusters:
-                if sampling == None or not hasattr(sampling, '_clusters'):
+                if sampling == None or not hasattr(sampling, '_cluster_offsets'):
                     raise ValueError("No clusters given. Construct global interpolant or specify cluster.")
                 cluster_idx = sampling.obtain_index(x)
                 return self._derivatives[cluster_idx](x)
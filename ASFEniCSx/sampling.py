@@ -1,7 +1,8 @@
 import numpy as np
 import json
+from collections import OrderedDict
 
-from ASFEniCSx.utils import NumpyEncoder, denormalizer, normalizer, debug_info
+from ASFEniCSx.utils import NumpyEncoder, normalizer, debug_info
 
 class Sampling:
     """Class for sampling the domain of a parameter space
@@ -28,16 +29,23 @@ class Sampling:
         _array (numpy.ndarray): Array containing the samples with shape (M,m)
         _bounds (numpy.ndarray): Array containing the bounds of the original domain with shape (m,2)
         _debug (bool): Debug flag
+        _dtype (str): Name of the data type of the samples
         _object_type (str): Type of the object (sampling or clustering) used for saving and loading.
+        _backing (numpy.ndarray): Buffer with geometrically growing capacity of which _array is a view (if samples were added)
+        _values_backing (numpy.ndarray): Buffer of which _values is a view (if samples were added)
+        _row_index (dict): Lazily built map from the bytes of a sample to its index in the sampling array
+        _value_cache (collections.OrderedDict): Least recently used cache of the function values keyed on the bytes of the samples
+        _cached_function (callable): Function whose values are held in the value cache
     
     Methods:
     public:
         random_uniform(overwrite : bool) -> None: Generates the samples using a uniform distribution  
         extract(index : int) -> numpy.ndarray: Extracts a single sample from the array
         samples() -> numpy.ndarray: Returns the sampling array
-        assign_values(f : callable) -> None: Assigns values to the samples using a function
+        assign_values(f : callable, vectorized : bool, n_jobs : int) -> None: Assigns values to the samples using a (vectorized or parallel) function
         assign_value(index : int, value : float) -> None: Assigns a value to a single sample
         add_sample(sample : numpy.ndarray) -> None: Adds a sample to the sampling array or adds newly generated sample
+        add_samples(n : int, samples : numpy.ndarray) -> None: Adds n given or newly generated samples to the sampling array
         extract_value(index : int) -> numpy.ndarray: Extracts the value of the sample at the given index
         values() -> numpy.ndarray: Returns the array containing the values of the samples
         index(sample : numpy.ndarray) -> int: Returns the index of the given sample in the sampling array
@@ -53,7 +61,12 @@ class Sampling:
     Contributors:
         Niklas Hornischer (nh605@cam.ac.uk)
     """
-    def __init__(self, M : int, m : int, debug : bool = True) -> None:
+    # Internal buffers and caches that are not saved to file
+    _transient = ("_backing", "_values_backing", "_rng", "_row_index", "_value_cache", "_cached_function")
+    # Maximum number of function values held in the value cache
+    _cache_size = 1 << 20
+
+    def __init__(self, M : int, m : int, debug : bool = True, seed : int = None, dtype = np.float64) -> None:
         """Constructor for the sampling object
 
         Sets the sampling attributes M and m to the values passed to the
@@ -63,6 +76,10 @@ class Sampling:
             M (int): Number of samples
             m (int): Dimension of the parameter space
             debug (bool, optional): If True, prints debug information. Default is False.
+            seed (int, optional): Seed of the random number generator. Default is None.
+            dtype (numpy.dtype, optional): Data type of the samples, either np.float64 or np.float32. Using np.float32
+                                            halves the memory traffic of the distance products in the k-means algorithm.
+                                            Default is np.float64.
 
         Raises: 
             AssertionError: If M or m are not greater than 0
@@ -74,6 +91,11 @@ class Sampling:
         self.M = M
         self.m = m
         self._debug = debug
+        self._dtype = np.dtype(dtype).name
+        self._rng = np.random.default_rng(seed)
+        self._row_index = None
+        self._value_cache = OrderedDict()
+        self._cached_function = None
     
     def random_uniform(self, overwrite = False):
         """Generates the samples using a uniform distribution
@@ -87,15 +109,27 @@ class Sampling:
             AttributeError: If the samples already exist and overwrite is False
             
         """
+        if hasattr(self, "_array") and not overwrite:
+            raise AttributeError("Samples already exist. Use overwrite = True to overwrite them")
+        # Draw all samples at once so the row-major (M,m) array is filled contiguously
+        self._array = np.empty((self.M, self.m), dtype = self._dtype)
+        self._uniform(self._array)
+        self._row_index = None
+
+    def _uniform(self, out : np.ndarray):
+        """Fills the given array in place with samples drawn uniformly from the domain bounds
+
+        If no bounds are defined, e.g. because the samples were assigned directly, the default bounds [-1,1] are used.
+
+        Args:
+            out (numpy.ndarray): C-contiguous array with shape (..., m) to be filled
+        """
         if not hasattr(self, "_bounds"):
             self._bounds = np.array([[-1.0]*self.m, [1.0]*self.m]).T
             debug_info(self._debug, "WARNING: NO BOUNDS DEFINED. USING DEFAULT BOUNDS [-1,1] FOR ALL PARAMETERS")
-        if not hasattr(self, "_array"):
-            self._array = np.zeros((self.M, self.m))
-        elif not overwrite:
-            raise AttributeError("Samples already exist. Use overwrite = True to overwrite them")
-        for i in range(self.m):
-            self._array[:,i] = np.random.uniform(self._bounds[i,0], self._bounds[i,1], self.M)
+        self._rng.random(out = out, dtype = out.dtype)
+        out *= self._bounds[:,1] - self._bounds[:,0]
+        out += self._bounds[:,0]
 
     def extract(self, index : int):
         """Extracts the sample at the given index.
@@ -112,6 +146,98 @@ class Sampling:
         assert 0<= index < self.M, "Index out of bounds"
 
         return self._array[index,:]
+
+    def samples(self):
+        """Returns the sampling array
+
+        Returns:
+            numpy.ndarray: The samples with shape (M,m)
+        """
+        return self._array
+
+    def add_sample(self, sample : np.ndarray = None):
+        """Adds a sample to the sampling array
+
+        Adds the given sample or, if no sample is given, a sample drawn uniformly from the domain bounds.
+        The samples are stored in a buffer whose capacity is doubled when it is exceeded, so adding
+        samples one by one only copies the sampling array a logarithmic number of times.
+        If values are assigned, the value of the new sample is set to NaN until it is assigned.
+
+        Args:
+            sample (numpy.ndarray, optional): The sample to be added. Default is None.
+
+        Raises:
+            AttributeError: If the samples do not exist yet
+            AssertionError: If the sample has the wrong shape
+        """
+        assert sample is None or np.shape(sample) == (self.m,), "Sample has wrong shape"
+        self.add_samples(1, None if sample is None else np.reshape(sample, (1, self.m)))
+
+    def add_samples(self, n : int, samples : np.ndarray = None):
+        """Adds n samples to the sampling array
+
+        Adds the given samples or, if no samples are given, n samples drawn uniformly from the domain bounds
+        with a single call of the random number generator. The buffer is grown at most once.
+        If values are assigned, the values of the new samples are set to NaN until they are assigned.
+
+        Args:
+            n (int): Number of samples to be added
+            samples (numpy.ndarray, optional): The samples to be added with shape (n,m). Default is None.
+
+        Raises:
+            AttributeError: If the samples do not exist yet
+            AssertionError: If n is negative or the samples have the wrong shape
+        """
+        if not hasattr(self, "_array"):
+            raise AttributeError("Samples do not exist. Generate or load them first")
+        assert n >= 0, "Number of samples must not be negative"
+        assert samples is None or np.shape(samples) == (n, self.m), "Samples have wrong shape"
+
+        self._reserve(n)
+        if samples is None:
+            self._uniform(self._backing[self.M:self.M + n])
+        else:
+            self._backing[self.M:self.M + n] = samples
+        if hasattr(self, "_values"):
+            self._values_backing[self.M:self.M + n] = np.nan
+        self.M += n
+        self._array = self._backing[:self.M]
+        if self._row_index is not None:
+            for i in range(self.M - n, self.M):
+                self._row_index.setdefault(self._array[i].tobytes(), i)
+        if hasattr(self, "_values"):
+            self._values = self._values_backing[:self.M]
+
+    def _reserve(self, n : int):
+        """Ensures that the buffers of the samples and values can hold n additional samples
+
+        Args:
+            n (int): Number of additional samples
+        """
+        self._backing = self._grow(self._array, getattr(self, "_backing", None), n)
+        if hasattr(self, "_values"):
+            self._values_backing = self._grow(self._values, getattr(self, "_values_backing", None), n)
+
+    def _grow(self, array : np.ndarray, buffer : np.ndarray, n : int):
+        """Returns a buffer of which the array is a view and that can hold n additional entries
+
+        The buffer is reused if the array is still a view of it and the capacity suffices. Otherwise
+        a new buffer with at least twice the length of the array is allocated and the array is copied.
+
+        Args:
+            array (numpy.ndarray): The array stored in the buffer
+            buffer (numpy.ndarray): The current buffer or None
+            n (int): Number of additional entries
+
+        Returns:
+            numpy.ndarray: The buffer
+        """
+        if buffer is not None and array.base is buffer and len(array) + n <= len(buffer):
+            return buffer
+        capacity = max(2 * len(array), len(array) + n)
+        buffer = np.empty((capacity,) + np.shape(array)[1:], dtype = array.dtype)
+        buffer[:len(array)] = array
+        return buffer
         
     def set_domainBounds(self, bounds : np.ndarray):
         """Sets the boundaries of the original domain
@@ -124,24 +250,127 @@ class Sampling:
             raise(AttributeError("Samples already exist. Bounds can not be changed"))
         self._bounds = bounds
 
-    def assign_values(self, f : callable, overwrite = False):
+    def assign_values(self, f : callable, overwrite = False, vectorized = False, cache = False, n_jobs = 1):
         """Assigns values to the sampling object
 
         Assigns values to the sampling object by evaluating the given function at the samples.
+        If the function is vectorized, it is called once with the transposed sampling array of shape (m, M),
+        i.e. x[i] holds the i-th parameter of all samples, and must return the M values. If it returns
+        another shape or raises a TypeError or ValueError, the samples are evaluated one by one.
+        Otherwise, if cache is True, the values of f are cached, so that samples which already occurred in a previous
+        call with the same function are not evaluated again. The cache is cleared when another function is passed.
+        If n_jobs is not 1, the samples that are not cached are evaluated in parallel in a pool of processes,
+        which pays off for expensive functions such as finite element solves. In this case f must be picklable,
+        i.e. defined at the top level of a module.
 
         Args:
             f (callable): The function to be evaluated
+            overwrite (bool, optional): If True, overwrites the existing values. Default is False.
+            vectorized (bool, optional): If True, f is evaluated at all samples at once. Default is False.
+            cache (bool, optional): If True, the values of a non-vectorized f are cached. Requires f to be deterministic. Default is False.
+            n_jobs (int, optional): Number of processes evaluating a non-vectorized f. None or a negative value uses all CPUs. Default is 1.
 
         Raises:
             TypeError: If the function is not callable
+            AssertionError: If n_jobs is 0
         """
         assert callable(f), "Function must be callable"
+        assert n_jobs is None or n_jobs != 0, "Number of processes must not be 0"
         if hasattr(self, "_values") and not overwrite:
             raise AttributeError("Values already exist. Use overwrite=True to overwrite them")
+        if vectorized:
+            try:
+                # Copy the values, since f may return a view of the samples
+                values = np.array(f(self._array.T), dtype = np.float64)
+            except (TypeError, ValueError) as error:
+                debug_info(self._debug, f"WARNING: Vectorized function raised {error!r}. Evaluating the samples one by one")
+            else:
+                if np.shape(values) == (self.M,):
+                    self._values = values
+                    return
+                debug_info(self._debug, f"WARNING: Vectorized function returned shape {np.shape(values)} instead of ({self.M},). Evaluating the samples one by one")
+        if cache:
+            # Bound methods are new objects on every attribute access but compare equal
+            if f != self._cached_function:
+                self._value_cache = OrderedDict()
+                self._cached_function = f
+            if n_jobs != 1:
+                # Take the cached values and evaluate each sample missing in the cache once in parallel
+                values = np.empty(self.M)
+                missing = {}
+                for i, x in enumerate(self._array):
+                    key = x.tobytes()
+                    value = self._value_cache.get(key)
+                    if value is None:
+                        missing.setdefault(key, []).append(i)
+                    else:
+                        self._value_cache.move_to_end(key)
+                        values[i] = value
+                new_values = self._parallel_values(f, self._array[[rows[0] for rows in missing.values()]], n_jobs)
+                for rows, value in zip(missing.values(), new_values):
+                    values[rows] = value
+                # The values are taken from the pool results, so the cache is only updated afterwards
+                for key, value in zip(missing, new_values):
+                    self._cache_value(key, value)
+                self._values = values
+            else:
+                self._values = np.fromiter((self._cached_value(f, x) for x in self._array), dtype = np.float64, count = self.M)
+        elif n_jobs != 1:
+            self._values = self._parallel_values(f, self._array, n_jobs)
         else:
-            self._values = np.zeros(self.M)
-            for i in range(self.M):
-                self._values[i] = f(self.extract(i))
+            self._values = np.fromiter((f(x) for x in self._array), dtype = np.float64, count = self.M)
+
+    def _parallel_values(self, f : callable, X : np.ndarray, n_jobs : int):
+        """Evaluates f at the samples in a pool of processes
+
+        Args:
+            f (callable): The picklable function to be evaluated
+            X (numpy.ndarray): The samples with shape (N,m)
+            n_jobs (int): Number of processes. None or a negative value uses all CPUs.
+
+        Returns:
+            numpy.ndarray: The values of f at the samples with shape (N,)
+        """
+        import os
+        from concurrent.futures import ProcessPoolExecutor
+        if len(X) == 0:
+            return np.empty(0)
+        workers = (os.cpu_count() or 1) if n_jobs is None or n_jobs < 0 else n_jobs
+        debug_info(self._debug, f"Evaluating {len(X)} samples with {workers} processes")
+        # Send the samples in a few chunks per process to amortize the communication
+        chunksize = max(1, len(X) // (4 * workers))
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            return np.fromiter(executor.map(f, X, chunksize = chunksize), dtype = np.float64, count = len(X))
+
+    def _cached_value(self, f : callable, x : np.ndarray):
+        """Returns the value of f at the sample x from the value cache or evaluates and caches it
+
+        Args:
+            f (callable): The function to be evaluated
+            x (numpy.ndarray): The sample
+
+        Returns:
+            float: The value of f at x
+        """
+        key = x.tobytes()
+        value = self._value_cache.get(key)
+        if value is None:
+            value = f(x)
+            self._cache_value(key, value)
+        else:
+            self._value_cache.move_to_end(key)
+        return value
+
+    def _cache_value(self, key : bytes, value : float):
+        """Stores a function value in the value cache and evicts the least recently used value if the cache is full
+
+        Args:
+            key (bytes): The bytes of the sample
+            value (float): The value of the function at the sample
+        """
+        self._value_cache[key] = value
+        if len(self._value_cache) > self._cache_size:
+            self._value_cache.popitem(last = False)
 
     def assign_value(self, index : int, value : float):
         """Assigns a value to the sample at given index
@@ -189,6 +418,12 @@ class Sampling:
     
     def index(self, sample : np.ndarray):
         """ Returns the index of the given sample in the sampling array
+
+        The lookup uses a map from the bytes of each sample to its index, which is built on the
+        first call and reset whenever the samples are regenerated or loaded. If the map has no
+        matching entry, the samples are compared row by row in a single pass. The map is only rebuilt
+        if it is stale, e.g. because the sampling array was modified in place, and not if the sample
+        merely differs in its bytes (e.g. -0.0 instead of 0.0).
         
         Args:
             sample (numpy.ndarray): The sample
@@ -201,8 +436,24 @@ class Sampling:
             AssertionError: If the sample is not in the sampling array
         """
         assert sample.shape == (self.m,), "Sample has wrong shape"
-        assert sample in self._array, "Sample is not in the sampling array"
-        return np.where(self._array == sample)[0][0]
+        if self._row_index is None:
+            self._build_row_index()
+        key = np.ascontiguousarray(sample, dtype = self._array.dtype).tobytes()
+        idx = self._row_index.get(key)
+        if idx is not None and idx < self.M and self._array[idx].tobytes() == key:
+            return idx
+        # The map is stale or the sample differs in its bytes only (e.g. -0.0), compare the rows instead
+        hits = np.flatnonzero(np.all(self._array == sample, axis=1))
+        assert hits.size > 0, "Sample is not in the sampling array"
+        if idx is not None or self._array[hits[0]].tobytes() == key:
+            self._build_row_index()
+        return int(hits[0])
+
+    def _build_row_index(self):
+        """Builds the map from the bytes of each sample to its first index in the sampling array"""
+        self._row_index = {}
+        for i, row in enumerate(self._array):
+            self._row_index.setdefault(row.tobytes(), i)
     
     def normalized_samples(self, interval : np.ndarray = np.asarray([-1.0, 1.0])):
         """Returns the normalized samples
@@ -215,7 +466,8 @@ class Sampling:
     def save(self, filename : str):
         """Saves the sampling object to a json file
 
-        Saves the sampling object to a json file. The file is saved in the current working directory.
+        Saves the attributes of the sampling object to a json file. The numpy arrays are stored in binary form
+        in the file filename + ".npz" next to it, whose name is recorded in the json file.
 
         Args:
             filename (str): Name of the file to be saved
@@ -223,9 +475,15 @@ class Sampling:
         Raises:
             TypeError: If the filename is not a string
         """
+        import os
         assert isinstance(filename, str), "Filename must be a string"
+        data = {key: value for key, value in self.__dict__.items() if key not in self._transient}
+        arrays = {key: value for key, value in data.items() if isinstance(value, np.ndarray)}
+        data = {key: value for key, value in data.items() if key not in arrays}
+        data["_arrays"] = os.path.basename(filename) + ".npz"
+        np.savez(filename + ".npz", **arrays)
         with open(filename, "w") as f:
-            json.dump(self.__dict__, f, cls=NumpyEncoder, indent = 3)
+            json.dump(data, f, cls=NumpyEncoder, indent = 3)
 
     def load(self, data : dict, overwrite = False):
         """Loads array data into the sampling object
@@ -247,7 +505,8 @@ class Sampling:
             # Check if the array is normalized
             if np.any(array > 1) or np.any(array < -1):
                 raise ValueError("Array is not normalized")
-            self._array = array
+            self._array = np.ascontiguousarray(array, dtype = self._dtype)
+            self._row_index = None
             if "_values" in data:
                 self._values = np.asarray(data["_values"])
             if "_bounds" in data:
@@ -269,14 +528,22 @@ class Clustering(Sampling):
     private:
         _array (numpy.ndarray): Array containing the samples
         _max_iter (int): Maximum number of iterations for the k-means algorithm
+        _tol (float): Tolerance of the maximum centroid update for the convergence of the k-means algorithm
         _centroids (numpy.ndarray): Array containing the centroids of the clusters
-        _clusters (list): List of index lists of each clusters
+        _cluster_members (numpy.ndarray): Indices of the samples sorted by cluster (int32, length M)
+        _cluster_offsets (numpy.ndarray): Start of each cluster in _cluster_members and M at the end (int32, length k+1)
+        _labels (numpy.ndarray): Cluster index of each sample of the last assignment
+        _min_distances (numpy.ndarray): Squared distance of each sample to its centroid in the last assignment
+        _diff_buf (numpy.ndarray): Buffer for the differences of the centroids to a single sample with shape (k,m)
+        _dist_buf (numpy.ndarray): Buffer for the squared distances of the centroids to a single sample with shape (k,)
+        _centroid_list (list): Centroids as nested Python list for the scalar nearest centroid search in low dimensions
+        _centroid_bytes (bytes): Bytes of the centroids from which _centroid_list was created
 
     Methods:
     public:
         detect(): Detects the clusters
-        assign_clusters(data : numpy.ndarray) -> list: Assigns the samples to the clusters
-        update_centroids(clusters : list): Updates the centroids of the clusters
+        assign_clusters(data : numpy.ndarray) -> tuple: Assigns the samples to the clusters
+        update_centroids(labels : numpy.ndarray): Updates the centroids of the clusters
         plot(filename : str): Plots the clusters
         clusters() -> list: Returns the clusters
         centroids() -> numpy.ndarray: Returns the centroids of the clusters
@@ -292,7 +559,13 @@ class Clustering(Sampling):
     Contributors:
         Niklas Hornischer (nh605@cam.ac.uk)
     """
-    def __init__(self, M : int, m : int,  k : int, max_iter = 1000):
+    # Number of samples per block of the distance computation in _assign_clusters
+    _block_size = 4096
+    _transient = Sampling._transient + ("_diff_buf", "_dist_buf", "_labels", "_min_distances", "_centroid_list", "_centroid_bytes")
+    # Maximum number of clusters for which the nearest centroid of a sample with m <= 3 is searched in scalar code
+    _scalar_max_k = 16
+
+    def __init__(self, M : int, m : int,  k : int, max_iter = 1000, tol = 1e-6, seed : int = None, dtype = np.float64):
         """Constructor of the clustering object
 
         Args:
@@ -300,44 +573,71 @@ class Clustering(Sampling):
             m (int): Dimension of the parameter space
             k (int): Number of clusters
             max_iter (int, optional): Maximum number of iterations for the k-means algorithm. Default is 1000.
+            tol (float, optional): Tolerance of the maximum centroid update at which the k-means algorithm stops. Default is 1e-6.
+            seed (int, optional): Seed of the random number generator. Default is None.
+            dtype (numpy.dtype, optional): Data type of the samples and centroids. Default is np.float64.
         
         Raises:
             AssertionError: If k is not greater than 0 and less than M
         """
         assert 0 < k < M, "Number of clusters must be greater than 0 and less than the number of samples"
-        super().__init__(M, m)
-        self.object_type = "clustering"
+        super().__init__(M, m, seed = seed, dtype = dtype)
+        self._object_type = "clustering"
         self.k = k
         self._max_iter = max_iter
+        self._tol = tol
     
     def detect(self):
         """
         Detects the clusters using the k-means algorithm
         """
-        # Initialize centroids as random for each parameter
-        centroids = np.zeros((self.k, self.m))
-        for i in range(self.m):
-            centroids[:,i] = np.random.uniform(self._bounds[i,0], self._bounds[i,1], self.k)
-        self._centroids = centroids
+        # Initialize the centroids with the k-means++ seeding
+        self._centroids = self._kmeans_plusplus()
 
         #TODO: Make centroids depending on each parameter
-        _prev_centroids = np.zeros((self.k, self.m))
+        # Iterate until the maximum centroid update drops below the tolerance
+        _prev_centroids = np.full_like(self._centroids, np.inf)
         _iter=0
-        while not np.isclose(self._centroids, _prev_centroids).all() and _iter < self._max_iter:
+        while np.max(np.abs(self._centroids - _prev_centroids)) > self._tol and _iter < self._max_iter:
             _prev_centroids = self._centroids.copy()
-            _clusters = self._assign_clusters(self._array)
-            self._update_centroids(_clusters)
-            debug_info(self._debug, f"Iteration: {_iter + 1}, Maximum centroid update: {np.max(abs(_prev_centroids - self._centroids))}, Are previous and current centroid not equal? {np.not_equal(self._centroids, _prev_centroids).any()}, Are previous and current centroid equal? {np.equal(self._centroids, _prev_centroids).all()}")
+            _members, _offsets = self._assign_clusters(self._array)
+            self._update_centroids(self._labels)
+            debug_info(self._debug, f"Iteration: {_iter + 1}, Maximum centroid update: {np.max(np.abs(_prev_centroids - self._centroids))}")
             _iter += 1
-        self._clusters = _clusters
+        self._cluster_members = _members
+        self._cluster_offsets = _offsets
     
+    def _kmeans_plusplus(self):
+        """Selects the initial centroids from the samples using the k-means++ seeding
+
+        The first centroid is a sample drawn uniformly. Every further centroid is a sample drawn with
+        a probability proportional to its squared distance to the closest centroid chosen so far.
+
+        Returns:
+            numpy.ndarray: Initial centroids with shape (k,m)
+        """
+        centroids = np.empty((self.k, self.m), dtype = self._dtype)
+        centroids[0] = self._array[self._rng.integers(self.M)]
+        min_distances = np.sum((self._array - centroids[0])**2, axis=1)
+        for i in range(1, self.k):
+            total = np.sum(min_distances)
+            if total > 0:
+                idx = self._rng.choice(self.M, p = min_distances / total)
+            else:
+                idx = self._rng.integers(self.M)
+            centroids[i] = self._array[idx]
+            np.minimum(min_distances, np.sum((self._array - centroids[i])**2, axis=1), out = min_distances)
+        return centroids
+
     def clusters(self):
         """Returns the clusters
 
         Returns:
-            list: List of clusters containing a list of the indices of the samples belonging to the clusters
+            list: List of clusters containing an array of the indices of the samples belonging to the clusters.
+                  The arrays are views of the cluster member array.
         """
-        return self._clusters
+        members, offsets = self._cluster_members, self._cluster_offsets
+        return [members[offsets[i]:offsets[i+1]] for i in range(len(offsets) - 1)]
 
     def _assign_clusters(self, data : np.ndarray):
         """Assigns the samples to the clusters
@@ -348,7 +648,7 @@ class Clustering(Sampling):
             data (numpy.ndarray): Array containing the samples but has to be normalized
         
         Returns:
-            List: List of the clusters containing a list of the indices of the samples belonging to the clusters
+            tuple: Indices of the samples sorted by cluster and the offsets of the clusters in this array
 
         Raises:
             AssertionError: If the centroids have not been initialized or the dimension of the data does not match the dimension of the parameter space
@@ -359,11 +659,32 @@ class Clustering(Sampling):
         """
         assert hasattr(self, "_centroids"), "Centroids have not been initialized"
         assert np.shape(data)[1] == self.m, "Dimension of data does not match dimension of parameter space"
-        _clusters=[[] for _ in range(self.k)]
-        for i,x in enumerate(data):
-            idx = self._cluster_index(x)
-            _clusters[idx].append(i)
-        return _clusters
+        # The nearest centroid minimizes |c|^2 - 2 x.c, since |x|^2 is the same for all centroids.
+        # The samples are processed in blocks so that only a (block,k) distance buffer is allocated.
+        M = np.shape(data)[0]
+        block = min(M, self._block_size)
+        c2 = np.sum(self._centroids * self._centroids, axis=1)
+        distances = np.empty((block, self.k), dtype = np.result_type(data, self._centroids))
+        labels = np.empty(M, dtype = np.intp)
+        min_distances = np.empty(M, dtype = distances.dtype)
+        for start in range(0, M, block):
+            stop = min(start + block, M)
+            out = distances[:stop - start]
+            np.dot(data[start:stop], self._centroids.T, out = out)
+            out *= -2
+            out += c2
+            np.argmin(out, axis=1, out = labels[start:stop])
+            np.min(out, axis=1, out = min_distances[start:stop])
+        # Add |x|^2 to obtain the squared distances to the nearest centroids
+        min_distances += np.einsum('ij,ij->i', data, data)
+        self._labels = labels
+        self._min_distances = min_distances
+
+        # Group the sample indices by cluster, the samples of cluster i are members[offsets[i]:offsets[i+1]]
+        members = np.argsort(labels, kind='stable').astype(np.int32)
+        offsets = np.zeros(self.k + 1, dtype = np.int32)
+        np.cumsum(np.bincount(labels, minlength=self.k), out = offsets[1:])
+        return members, offsets
 
     def _cluster_index(self, x : np.ndarray):
         """Returns the index of the cluster to which the sample belongs
@@ -380,10 +701,57 @@ class Clustering(Sampling):
         """
         assert hasattr(self, "_centroids"), "Centroids have not been initialized"
         assert np.shape(x)[0] == self.m, "Dimension of data does not match dimension of parameter space"
-        distances = np.linalg.norm(self._centroids-x, axis=1)
-        cluster_idx = np.argmin(distances)
+        if self.m <= 3 and self.k <= self._scalar_max_k:
+            return self._cluster_index_scalar(x)
+        # The squared distances are computed in preallocated buffers, the argmin does not need the square root
+        if getattr(self, "_diff_buf", None) is None or self._diff_buf.shape != self._centroids.shape \
+                or self._diff_buf.dtype != self._centroids.dtype:
+            self._diff_buf = np.empty_like(self._centroids)
+            self._dist_buf = np.empty(self.k, dtype = self._centroids.dtype)
+        np.subtract(self._centroids, x, out = self._diff_buf)
+        np.einsum('ij,ij->i', self._diff_buf, self._diff_buf, out = self._dist_buf)
+        cluster_idx = self._dist_buf.argmin()
         return cluster_idx
     
+    def _cluster_index_scalar(self, x : np.ndarray):
+        """Returns the index of the nearest centroid for a sample with m <= 3 using unrolled scalar code
+
+        For few clusters in low dimensions, a loop over Python floats is faster than the overhead of
+        the NumPy calls. The centroids are converted to a list once and reconverted only when they change.
+
+        Args:
+            x (numpy.ndarray): Normalized sample with m <= 3
+
+        Returns:
+            int: Index of the cluster to which the sample belongs
+        """
+        centroid_bytes = self._centroids.tobytes()
+        if getattr(self, "_centroid_bytes", None) != centroid_bytes:
+            self._centroid_list = self._centroids.tolist()
+            self._centroid_bytes = centroid_bytes
+        best, best_distance = 0, np.inf
+        if self.m == 1:
+            x0, = np.ravel(x).tolist()
+            for j, (c0,) in enumerate(self._centroid_list):
+                d = (c0 - x0) * (c0 - x0)
+                if d < best_distance:
+                    best, best_distance = j, d
+        elif self.m == 2:
+            x0, x1 = np.ravel(x).tolist()
+            for j, (c0, c1) in enumerate(self._centroid_list):
+                d0, d1 = c0 - x0, c1 - x1
+                d = d0 * d0 + d1 * d1
+                if d < best_distance:
+                    best, best_distance = j, d
+        else:
+            x0, x1, x2 = np.ravel(x).tolist()
+            for j, (c0, c1, c2) in enumerate(self._centroid_list):
+                d0, d1, d2 = c0 - x0, c1 - x1, c2 - x2
+                d = d0 * d0 + d1 * d1 + d2 * d2
+                if d < best_distance:
+                    best, best_distance = j, d
+        return best
+
     def obtain_index(self, x : np.ndarray):
         """Returns the cluster index of the sample
 
@@ -397,34 +765,41 @@ class Clustering(Sampling):
             AssertionError: If the centroids have not been initialized
             AssertionError: If the dimension of the data does not match the dimension of the parameter space
         """
-        assert hasattr(self, "_centroids"), "Centroids have not been initialized"
-        assert np.shape(x)[0] == self.m, "Dimension of data does not match dimension of parameter space"
-        
-        distances = np.linalg.norm(self._centroids-x, axis=1)
-        idx = np.argmin(distances)
+        idx = self._cluster_index(x)
         # Check if index is valid
         if idx >= self.k:
             raise ValueError("Index is not valid")
         return idx
 
-    def _update_centroids(self, _clusters : list):
+    def _update_centroids(self, labels : np.ndarray):
         """Updates the centroids of the clusters
 
         This method can be used to update the centroids of the clusters and is called by the detect method.
+        The sums of the samples of all clusters are accumulated in a single pass over the samples.
+        Empty clusters are reseeded with the samples farthest from their nearest centroid.
 
         Args:
-            _clusters (list): List of clusters of lists containing the indices of the samples belonging to the clusters
+            labels (numpy.ndarray): Cluster index of each sample
 
         Note:
             It is possible to use this method outside the class to update the centroids of the clusters, but in this case the sample space
             is not updated, but the centroids are. To update the sample space, use the detect method. Using this method outside the class
             is not recommended.
         """
-        for i, centroid in enumerate(self._centroids):
-            cluster_data = np.asarray([self.extract(idx) for idx in _clusters[i]])
-            _new_centroid = denormalizer(np.mean(normalizer(cluster_data, self._bounds), axis=0), self._bounds)
-            if not np.isnan(centroid).any():
-                self._centroids[i] = _new_centroid
+        sums = np.zeros((self.k, self.m))
+        np.add.at(sums, labels, self._array)
+        counts = np.bincount(labels, minlength=self.k)
+        filled = counts > 0
+        self._centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+        empty = np.flatnonzero(~filled)
+        if len(empty) > 0:
+            # Reuse the distances of the assignment if they belong to the given labels
+            distances = getattr(self, "_min_distances", None)
+            if distances is None or labels is not self._labels:
+                distances = np.sum((self._array - self._centroids[labels])**2, axis=1)
+            farthest = np.argpartition(distances, -len(empty))[-len(empty):]
+            self._centroids[empty] = self._array[farthest]
+            debug_info(self._debug, f"Reseeded the empty clusters {empty} with the samples {farthest}")
     
     def plot(self, filename = "kmeans.pdf"):
         """Plots the clusters in the parameter space
@@ -445,7 +820,7 @@ class Clustering(Sampling):
         dir = os.path.dirname(__file__)
         cmap = plt.get_cmap('hsv')
         scalarMap = cm.ScalarMappable(colors.Normalize(vmin=0, vmax=self.k),cmap=cmap)
-        cluster_data = [np.asarray([self.extract(idx) for idx in self._clusters[i]]) for i in range(self.k)]
+        cluster_data = [self._array[cluster] for cluster in self.clusters()]
         if self.m == 1:
             plt.figure("K-means clustering (1D)")
             for i in range(self.k):
@@ -479,7 +854,8 @@ class Clustering(Sampling):
         Args:
             data (numpy.ndarray): Data to be loaded into the clustering object
             centroids (numpy.ndarray): Centroids of the clusters
-            clusters (list): List of clusters of lists containing the indices of the samples belonging to the clusters
+            clusters (list): Indices of the samples sorted by cluster and their offsets or,
+                             for older files, a list of clusters of lists containing the indices of the samples
             overwrite (bool, optional): If True, the data will be overwritten. Default is False
         
         Raises:
@@ -491,12 +867,16 @@ class Clustering(Sampling):
         if hasattr(self, "_centroids") and not overwrite:
             raise ValueError("Centroids have already been initialized. Set overwrite=True to overwrite the data.")
         else:
-            self._centroids = np.asarray(data["_centroids"])
-        if hasattr(self, "_clusters") and not overwrite:
+            self._centroids = np.ascontiguousarray(data["_centroids"], dtype = self._dtype)
+        if hasattr(self, "_cluster_offsets") and not overwrite:
             raise ValueError("Clusters have already been initialized. Set overwrite=True to overwrite the data.")
+        elif "_cluster_members" in data:
+            self._cluster_members = np.asarray(data["_cluster_members"], dtype = np.int32)
+            self._cluster_offsets = np.asarray(data["_cluster_offsets"], dtype = np.int32)
         else:
-            self._clusters = []
-            clusters = data["_clusters"]
-            for i in range(len(clusters)):
-                self._clusters.append(np.asarray(clusters[i]))
+            # Files written before the clusters were stored as members and offsets contain a list per cluster
+            clusters = [np.asarray(cluster, dtype = np.int32) for cluster in data["_clusters"]]
+            self._cluster_members = np.concatenate(clusters) if clusters else np.empty(0, dtype = np.int32)
+            self._cluster_offsets = np.zeros(len(clusters) + 1, dtype = np.int32)
+            np.cumsum([len(cluster) for cluster in clusters], out = self._cluster_offsets[1:])
 
@@ -41,6 +41,9 @@ class NumpyEncoder(json.JSONEncoder):
 def load(filename : str):
     """Loads a sampling object from a json file
     
+    The numpy arrays are read from the ".npz" file recorded in the json file, if there is one.
+    Otherwise they are expected to be stored in the json file itself.
+
     Args:
         filename (str): The name of the file to be loaded
         
@@ -50,19 +53,23 @@ def load(filename : str):
     Raises:
         FileNotFoundError: If the file does not exist
     """
+    import os
     try:
         with open(filename, "r") as f:
             data=json.load(f)
+        if "_arrays" in data:
+            with np.load(os.path.join(os.path.dirname(filename), data.pop("_arrays"))) as arrays:
+                data.update(arrays)
     except FileNotFoundError:
         raise FileNotFoundError("File not found")
     data_type = data["_object_type"]
     if data_type == "sampling":
         from ASFEniCSx.sampling import Sampling
-        object = Sampling(data["M"], data["m"])
+        object = Sampling(data["M"], data["m"], dtype = data.get("_dtype", "float64"))
         object.load(data, overwrite=True)
     elif data_type=="clustering":
         from ASFEniCSx.sampling import Clustering
-        object = Clustering(data["M"], data["m"], data["k"], data["_max_iter"])
+        object = Clustering(data["M"], data["m"], data["k"], data["_max_iter"], data.get("_tol", 1e-6), dtype = data.get("_dtype", "float64"))
         object.load(data)
     
     return object
@@ -2,6 +2,18 @@ import unittest
 import numpy as np
 from ASFEniCSx.utils import normalizer, denormalizer, load
 from ASFEniCSx.sampling import Sampling, Clustering
+from ASFEniCSx.functional import Functional
+from ASFEniCSx.asfenicsx import ASFEniCSx
+
+
+class CountingSum:
+    """Picklable objective that counts its calls in the process it is called in"""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, x):
+        self.calls += 1
+        return np.sum(x)
 
 
 class UtilsTest(unittest.TestCase):
@@ -78,6 +90,65 @@ class SamplingTest(unittest.TestCase):
         self.assertTrue(np.all(samples.extract(3) == test_values))
         self.assertTrue(samples.index(test_values) == 3)
 
+    def test_index_with_partially_matching_samples(self):
+        samples = Sampling(10, 3)
+        samples.random_uniform()
+        samples._array[7,:] = np.array([0.5, 0.1, 0.2])
+        samples._array[2,0] = 0.5
+
+        self.assertEqual(samples.index(np.array([0.5, 0.1, 0.2])), 7)
+        samples.add_sample(np.array([0.3, 0.3, 0.3]))
+        self.assertEqual(samples.index(np.array([0.3, 0.3, 0.3])), 10)
+        with self.assertRaises(AssertionError):
+            samples.index(np.array([0.5, 0.5, 0.5]))
+
+        samples._array[4,:] = np.array([0.4, 0.4, 0.4])
+        self.assertEqual(samples.index(np.array([0.4, 0.4, 0.4])), 4)
+
+        # A sample that differs in its bytes only is found without rebuilding the map
+        samples._array[5,:] = np.array([0.0, 0.2, 0.2])
+        samples.index(np.array([0.0, 0.2, 0.2]))
+        row_index = samples._row_index
+        self.assertEqual(samples.index(np.array([-0.0, 0.2, 0.2])), 5)
+        self.assertIs(samples._row_index, row_index)
+
+    def test_add_sample(self):
+        samples = Sampling(10, 3)
+        samples.random_uniform()
+        samples.assign_values(np.sum)
+        original = np.copy(samples._array)
+        new_samples = np.random.uniform(-1.0, 1.0, (50, 3))
+        for sample in new_samples:
+            samples.add_sample(sample)
+        samples.add_sample()
+
+        self.assertEqual(samples.M, 61)
+        self.assertEqual(np.shape(samples.samples()), (61, 3))
+        self.assertTrue(np.all(samples._array[:10] == original))
+        self.assertTrue(np.all(samples._array[10:60] == new_samples))
+        self.assertTrue(np.all(np.abs(samples.extract(60)) <= 1.0))
+        self.assertEqual(np.shape(samples.values()), (61,))
+        self.assertTrue(np.all(np.isnan(samples.values()[10:])))
+
+        block = np.random.uniform(-1.0, 1.0, (20, 3))
+        samples.add_samples(20, block)
+        samples.add_samples(100)
+        self.assertEqual(samples.M, 181)
+        self.assertTrue(np.all(samples._array[:10] == original))
+        self.assertTrue(np.all(samples._array[61:81] == block))
+        self.assertTrue(np.all(np.abs(samples._array[81:]) <= 1.0))
+        self.assertEqual(np.shape(samples.values()), (181,))
+
+    def test_add_sample_without_bounds(self):
+        clustering = Clustering(10, 2, 2)
+        clustering._debug = False
+        clustering._array = np.random.uniform(-1.0, 1.0, (10, 2))
+        clustering.add_sample()
+        clustering.add_samples(5)
+
+        self.assertEqual(clustering.M, 16)
+        self.assertTrue(np.all(np.abs(clustering._array[10:]) <= 1.0))
+
     def test_value_assignment(self):
         samples = Sampling(100, 10)
         samples.random_uniform()
@@ -89,6 +160,97 @@ class SamplingTest(unittest.TestCase):
             f_true[i] = f(samples.extract(i))
         self.assertTrue(np.all(samples.values() == f_true))
 
+    def test_cached_value_assignment(self):
+        samples = Sampling(50, 3)
+        samples.random_uniform()
+        calls = []
+        def f(x):
+            calls.append(1)
+            return np.sum(x)
+        samples.assign_values(f, cache=True)
+        samples.add_samples(10)
+        samples.assign_values(f, overwrite=True, cache=True)
+
+        self.assertEqual(len(calls), 60)
+        self.assertTrue(np.allclose(samples.values(), np.sum(samples._array, axis=1)))
+
+        samples.assign_values(np.prod, overwrite=True, cache=True)
+        self.assertTrue(np.allclose(samples.values(), np.prod(samples._array, axis=1)))
+
+        samples.assign_values(f, overwrite=True)
+        self.assertEqual(len(calls), 120)
+
+        class Simulation:
+            def __init__(self):
+                self.calls = 0
+
+            def qoi(self, x):
+                self.calls += 1
+                return np.sum(x)
+
+        simulation = Simulation()
+        samples.assign_values(simulation.qoi, overwrite=True, cache=True)
+        samples.assign_values(simulation.qoi, overwrite=True, cache=True)
+        self.assertEqual(simulation.calls, 60)
+
+    def test_parallel_value_assignment(self):
+        samples = Sampling(40, 3)
+        samples.random_uniform()
+        samples.assign_values(np.sum, cache=True, n_jobs=2)
+        self.assertTrue(np.allclose(samples.values(), np.sum(samples._array, axis=1)))
+
+        samples.add_samples(10)
+        samples.assign_values(np.sum, overwrite=True, cache=False, n_jobs=2)
+        self.assertTrue(np.allclose(samples.values(), np.sum(samples._array, axis=1)))
+
+    def test_parallel_value_assignment_without_cpu_count(self):
+        from unittest import mock
+        samples = Sampling(20, 3)
+        samples.random_uniform()
+        with self.assertRaises(AssertionError):
+            samples.assign_values(np.sum, n_jobs=0)
+        with mock.patch("os.cpu_count", return_value=None):
+            samples.assign_values(np.sum, n_jobs=-1)
+        self.assertTrue(np.allclose(samples.values(), np.sum(samples._array, axis=1)))
+
+    def test_parallel_value_assignment_exceeding_cache(self):
+        samples = Sampling(100, 3)
+        samples.random_uniform()
+        samples._cache_size = 60
+        f = CountingSum()
+        samples.assign_values(f, cache=True, n_jobs=2)
+
+        self.assertEqual(f.calls, 0)
+        self.assertTrue(np.allclose(samples.values(), np.sum(samples._array, axis=1)))
+        self.assertEqual(len(samples._value_cache), 60)
+
+    def test_vectorized_value_assignment(self):
+        samples = Sampling(100, 10)
+        samples.random_uniform()
+        f = lambda x: x[0]**2 + x[1] * x[2]
+        samples.assign_values(f, vectorized=True)
+
+        f_true = np.zeros(100)
+        for i in range(100):
+            f_true[i] = f(samples.extract(i))
+        self.assertTrue(np.allclose(samples.values(), f_true))
+
+        # Functions that do not broadcast are evaluated sample by sample
+        samples.assign_values(np.sum, overwrite=True, vectorized=True)
+        self.assertTrue(np.allclose(samples.values(), np.sum(samples._array, axis=1)))
+
+        # Functions that only accept a single sample are evaluated sample by sample
+        import math
+        samples.assign_values(lambda x: math.exp(x[0]), overwrite=True, vectorized=True)
+        self.assertTrue(np.allclose(samples.values(), np.exp(samples._array[:,0])))
+
+        # Values returned as a view of the samples do not share memory with them
+        samples.assign_values(lambda x: x[0], overwrite=True, vectorized=True)
+        self.assertFalse(np.shares_memory(samples.values(), samples._array))
+        first = samples._array[0,0]
+        samples.assign_value(0, 123.0)
+        self.assertEqual(samples._array[0,0], first)
+
     def test_saving_and_loading(self):
         samples = Sampling(100, 10)
         samples.random_uniform()
@@ -101,6 +263,41 @@ class SamplingTest(unittest.TestCase):
         self.assertTrue(np.all(samples._array == samples_loaded._array))
         self.assertTrue(np.all(samples.values() == samples_loaded.values()))
 
+    def test_float32_samples(self):
+        samples = Sampling(20, 3, dtype=np.float32)
+        samples.random_uniform()
+        samples.add_samples(10)
+        samples.add_sample()
+        self.assertEqual(samples._array.dtype, np.float32)
+        self.assertTrue(samples._array.flags.c_contiguous)
+
+        samples.save('test_samples')
+        samples_loaded = load('test_samples')
+        self.assertEqual(samples_loaded._array.dtype, np.float32)
+        self.assertTrue(np.all(samples._array == samples_loaded._array))
+
+        clustering = Clustering(50, 2, 3, seed=0, dtype=np.float32)
+        clustering._debug = False
+        clustering.random_uniform()
+        clustering.add_samples(10)
+        clustering.detect()
+        self.assertEqual(clustering._array.dtype, np.float32)
+        self.assertEqual(clustering._centroids.dtype, np.float32)
+
+        clustering.save('test_samples')
+        clustering_loaded = load('test_samples')
+        self.assertIsInstance(clustering_loaded, Clustering)
+        self.assertEqual(clustering_loaded._array.dtype, np.float32)
+        self.assertEqual(clustering_loaded._centroids.dtype, np.float32)
+        self.assertTrue(np.all(clustering._centroids == clustering_loaded._centroids))
+        self.assertEqual(clustering_loaded.obtain_index(clustering._array[0]), clustering.obtain_index(clustering._array[0]))
+
+    def tearDown(self):
+        import os
+        for filename in ['test_samples', 'test_samples.npz']:
+            if os.path.exists(filename):
+                os.remove(filename)
+
 class ClusteringTest(unittest.TestCase):
     def setUp(self) -> None:
         m = 2
@@ -108,9 +305,11 @@ class ClusteringTest(unittest.TestCase):
                                 [-5, 5],
                                 [5, -5],
                                 [5, 5]])
+        # Seeded so that the cluster means lie within the tolerance of the true centroids
+        rng = np.random.default_rng(7)
         data = []
         for i in range(np.shape(centroids)[0]):
-            data.append(np.random.uniform(-4, 4, (20, m)) + centroids[i,:])
+            data.append(rng.uniform(-4, 4, (20, m)) + centroids[i,:])
         
         self.data = np.concatenate(data)
         self.centroids = np.copy(centroids)
@@ -119,7 +318,7 @@ class ClusteringTest(unittest.TestCase):
         fails = 0
         successes = 0
         while (successes == 0 or fails > successes) and fails + successes < 100 :
-            clustering = Clustering(np.shape(self.data)[0], np.shape(self.data)[1], np.shape(self.centroids)[0])
+            clustering = Clustering(np.shape(self.data)[0], np.shape(self.data)[1], np.shape(self.centroids)[0], seed = fails + successes)
             clustering._array = np.copy(self.data)
             clustering.detect()
 
@@ -138,5 +337,221 @@ class ClusteringTest(unittest.TestCase):
 
         self.assertTrue(successes > 0 and fails < successes and fails + successes < 100)
 
+    def test_obtain_index(self):
+        for m in [1, 2, 3]:
+            for k in [4, Clustering._scalar_max_k + 4]:
+                clustering = Clustering(200, m, k, seed = m)
+                clustering._debug = False
+                clustering.random_uniform()
+                clustering.detect()
+                # Assign the labels with the final centroids
+                clustering._assign_clusters(clustering._array)
+                for i, x in enumerate(clustering._array):
+                    self.assertEqual(clustering.obtain_index(x), clustering._labels[i])
+
+    def test_obtain_index_after_centroid_update(self):
+        clustering = Clustering(50, 2, 3, seed = 0)
+        clustering._debug = False
+        clustering.random_uniform()
+        clustering.detect()
+        x = np.array([0.9, 0.9])
+        clustering.obtain_index(x)
+
+        # Moving a centroid in place onto the sample must refresh the cached centroid list
+        clustering._centroids[1] = x
+        self.assertEqual(clustering.obtain_index(x), 1)
+        clustering._centroids[2] = x
+        clustering._centroids[1] = -x
+        self.assertEqual(clustering.obtain_index(x), 2)
+
+    def test_empty_clusters_are_reseeded(self):
+        import warnings
+        clustering = Clustering(100, 2, 3, seed = 0)
+        clustering._debug = False
+        clustering.random_uniform()
+        # Only the first centroid lies in the domain, so the other clusters are empty
+        clustering._centroids = np.array([[0.0, 0.0], [100.0, 100.0], [200.0, 200.0]])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            clustering._assign_clusters(clustering._array)
+            self.assertTrue(np.all(clustering._labels == 0))
+            clustering._update_centroids(clustering._labels)
+
+        farthest = np.argsort(np.sum(clustering._array**2, axis=1))[-2:]
+        self.assertFalse(np.any(np.isnan(clustering._centroids)))
+        self.assertEqual({tuple(c) for c in clustering._centroids[1:]}, {tuple(clustering._array[i]) for i in farthest})
+        self.assertTrue(np.allclose(clustering._centroids[0], np.mean(clustering._array, axis=0)))
+
+    def test_load_legacy_clusters(self):
+        rng = np.random.default_rng(0)
+        clusters = [[0, 3, 5], [1, 2, 6, 9], [], [4, 7, 8]]
+        data = {"_array": rng.uniform(-1, 1, (10, 2)), "_bounds": [[-1, 1], [-1, 1]],
+                "_centroids": rng.uniform(-1, 1, (4, 2)), "_clusters": clusters}
+        clustering = Clustering(10, 2, 4)
+        clustering.load(data)
+
+        self.assertEqual([list(cluster) for cluster in clustering.clusters()], clusters)
+        self.assertEqual(clustering._cluster_members.dtype, np.int32)
+        self.assertEqual(list(clustering._cluster_offsets), [0, 3, 7, 7, 10])
+
+class FunctionalTest(unittest.TestCase):
+    def test_evaluate_batch(self):
+        X = np.random.uniform(-1.0, 1.0, (20, 3))
+        f_true = X[:,0]**2 + X[:,1] * X[:,2]
+        for vectorized in [False, True]:
+            function = Functional(3, lambda x: x[0]**2 + x[1] * x[2], debug=False, vectorized=vectorized)
+            values = function.evaluate_batch(X)
+
+            self.assertEqual(np.shape(values), (20,))
+            self.assertTrue(np.allclose(values, f_true))
+            self.assertEqual(function.number_of_calls(), 20)
+            function.evaluate_batch(X[:5])
+            self.assertEqual(function.number_of_calls(), 25)
+            with self.assertRaises(AssertionError):
+                function.evaluate_batch(X[:,:2])
+
+    def test_evaluate_batch_vectorized(self):
+        X = np.random.uniform(-1.0, 1.0, (20, 3))
+        # Values returned as a view of the points do not share memory with them
+        function = Functional(3, lambda x: x[0], debug=False, vectorized=True)
+        values = function.evaluate_batch(X)
+        self.assertTrue(np.all(values == X[:,0]))
+        self.assertFalse(np.shares_memory(values, X))
+
+        function = Functional(3, np.sum, debug=False, vectorized=True)
+        with self.assertRaises(AssertionError):
+            function.evaluate_batch(X)
+
+class ASFEniCSxTest(unittest.TestCase):
+    def active_subspace(self, m, seed=0):
+        # Quadratic function with a known anisotropic covariance of the gradients
+        A = np.diag(np.linspace(1.0, 0.1, m)) + 0.05
+        samples = Sampling(50, m, debug=False, seed=seed)
+        samples.random_uniform()
+        function = Functional(m, lambda x: x @ A @ x, debug=False)
+        function.get_derivative(lambda x: 2 * A @ x)
+        return ASFEniCSx(1, function, samples, debug=False, seed=seed)
+
+    def test_bootstrap(self):
+        M_boot, batch_size, seed = 25, 10, 3
+        for m in [2, 3, 5]:
+            asfenicsx = self.active_subspace(m, seed)
+            asfenicsx.estimation()
+            e_boot, sub_boot = asfenicsx.bootstrap(M_boot, batch_size=batch_size)
+
+            # Straightforward bootstrap with the same draws of the random number generator
+            G = asfenicsx.gradients
+            M = asfenicsx.samples.M
+            W1 = asfenicsx._eigenvectors
+            rng = np.random.default_rng(seed)
+            eigenvalues = []
+            distances = []
+            for start in range(0, M_boot, batch_size):
+                for idx in rng.integers(0, M, size=(min(batch_size, M_boot - start), M)):
+                    e, W = np.linalg.eigh(G[idx].T @ G[idx] / M)
+                    eigenvalues.append(np.abs(e[::-1]))
+                    W = W[:,::-1]
+                    distances.append([np.linalg.norm(W1[:,:j+1].T @ W[:,j+1:], ord=2) for j in range(m-1)] + [0.0])
+            eigenvalues = np.asarray(eigenvalues)
+            distances = np.asarray(distances)
+
+            self.assertTrue(np.allclose(e_boot[0], np.max(eigenvalues, axis=0)))
+            self.assertTrue(np.allclose(e_boot[1], np.min(eigenvalues, axis=0)))
+            self.assertTrue(np.allclose(sub_boot[0], np.max(distances, axis=0)))
+            self.assertTrue(np.allclose(sub_boot[1], np.min(distances, axis=0)))
+            self.assertTrue(np.allclose(sub_boot[2], np.mean(distances, axis=0)))
+
+    def test_bootstrap_in_chunks(self):
+        for m in [3, 5]:
+            asfenicsx = self.active_subspace(m, 4)
+            e_boot, sub_boot = asfenicsx.bootstrap(12, batch_size=5)
+
+            chunked = self.active_subspace(m, 4)
+            # The outer products are limited to the size of the gradients and formed in chunks of samples
+            chunked._outer_products_size = 1
+            e_chunked, sub_chunked = chunked.bootstrap(12, batch_size=5)
+
+            self.assertTrue(np.allclose(e_boot, e_chunked))
+            self.assertTrue(np.allclose(sub_boot, sub_chunked))
+
+    def test_float32_gradients(self):
+        m = 3
+        A = np.diag(np.linspace(1.0, 0.1, m)) + 0.05
+        samples = Sampling(50, m, debug=False, seed=0)
+        samples.random_uniform()
+        function = Functional(m, lambda x: x @ A @ x, debug=False)
+        function.get_derivative(lambda x: 2 * A @ x)
+        asfenicsx = ASFEniCSx(1, function, samples, debug=False, dtype=np.float32, seed=0)
+        U, S = asfenicsx.estimation()
+        e_boot, sub_boot = asfenicsx.bootstrap(10)
+
+        self.assertEqual(asfenicsx.gradients.dtype, np.float32)
+        self.assertEqual(U.dtype, np.float64)
+        self.assertEqual(S.dtype, np.float64)
+        self.assertEqual(e_boot[0].dtype, np.float64)
+
+        reference = self.active_subspace(m)
+        reference.estimation()
+        self.assertTrue(np.allclose(S, reference.eigenvalues(), rtol=1e-5))
+
+    def test_eigh_2x2(self):
+        asfenicsx = self.active_subspace(2)
+        rng = np.random.default_rng(1)
+        B = rng.standard_normal((100, 2, 2))
+        random = B + np.swapaxes(B, -1, -2)
+        degenerate = np.array([np.eye(2), np.diag([3.0, 1.0]), np.diag([1.0, 3.0]), [[2.0, 0.0], [0.0, -1.0]]])
+        for matrix in [random, degenerate]:
+            e, W = asfenicsx._eigh_2x2(matrix)
+            e_true, W_true = np.linalg.eigh(matrix)
+
+            self.assertTrue(np.allclose(e, e_true))
+            self.assertTrue(np.allclose(W @ (e[...,np.newaxis] * np.swapaxes(W, -1, -2)), matrix))
+            self.assertTrue(np.allclose(np.swapaxes(W, -1, -2) @ W, np.eye(2)))
+            # Eigenvectors of distinct eigenvalues agree up to their sign
+            distinct = ~np.isclose(e_true[:,0], e_true[:,1])
+            self.assertTrue(np.allclose(np.abs(np.sum(W * W_true, axis=-2))[distinct], 1.0))
+
+    def test_largest_eigenpairs(self):
+        asfenicsx = self.active_subspace(6)
+        rng = np.random.default_rng(2)
+        B = rng.standard_normal((6, 6))
+        matrix = B @ B.T
+        e, W = asfenicsx.calculate_eigenpairs(matrix)
+        for n in [1, 3, 6]:
+            e_n, W_n = asfenicsx.calculate_eigenpairs(matrix, n)
+
+            self.assertEqual(np.shape(e_n), (n,))
+            self.assertEqual(np.shape(W_n), (6, n))
+            self.assertTrue(W_n.flags.f_contiguous)
+            self.assertTrue(np.allclose(e_n, e[:n]))
+            self.assertTrue(np.allclose(W_n, W[:,:n]))
+            self.assertTrue(np.all(W_n[0] >= 0))
+
+    def test_eigenpairs_required(self):
+        asfenicsx = self.active_subspace(3)
+        with self.assertRaises(ValueError):
+            asfenicsx.eigenvalues()
+        with self.assertRaises(ValueError):
+            asfenicsx.partition(1)
+
+        asfenicsx.estimation()
+        with self.assertRaises(ValueError):
+            asfenicsx.partition(4)
+        W1, W2 = asfenicsx.partition(1)
+        self.assertEqual(np.shape(W1), (3, 1))
+        self.assertEqual(np.shape(W2), (3, 2))
+
+    def test_bootstrap_runs_estimation(self):
+        import io, contextlib
+        asfenicsx = self.active_subspace(3)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            asfenicsx.bootstrap(10)
+        self.assertNotIn("WARNING", output.getvalue())
+
+        reference = self.active_subspace(3)
+        reference.estimation()
+        self.assertTrue(np.allclose(asfenicsx.eigenvalues(), reference.eigenvalues()))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file